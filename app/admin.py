@@ -2,6 +2,7 @@ from typing import Dict, List, Any
 from pydantic import BaseModel, Field
 
 from .model_loader import model_registry
+from .cache import response_cache
 from .config import settings
 
 
@@ -42,8 +43,10 @@ async def set_active_version(request: VersionRequest) -> VersionResponse:
     
     # Check if version exists
     available_versions = model_registry.get_available_versions()
+    # Responses below are built from trusted in-process registry data, so
+    # validation is skipped with model_construct().
     if version not in available_versions:
-        return VersionResponse(
+        return VersionResponse.model_construct(
             success=False,
             message=f"Version '{version}' not found. Available versions: {available_versions}",
             active_version=model_registry.get_active_version()
@@ -53,13 +56,14 @@ async def set_active_version(request: VersionRequest) -> VersionResponse:
     success = model_registry.set_active_version(version)
     
     if success:
-        return VersionResponse(
+        await response_cache.clear()
+        return VersionResponse.model_construct(
             success=True,
             message=f"Successfully switched to version '{version}'",
             active_version=version
         )
     else:
-        return VersionResponse(
+        return VersionResponse.model_construct(
             success=False,
             message=f"Failed to switch to version '{version}'",
             active_version=model_registry.get_active_version()
@@ -72,8 +76,7 @@ async def get_health_status() -> HealthResponse:
     available_versions = model_registry.get_available_versions()
     
     # Count loaded models
-    loaded_count = sum(1 for version in available_versions 
-                      if model_registry.is_version_loaded(version))
+    loaded_count = len(model_registry.loaded_versions().intersection(available_versions))
     
     # Determine overall status
     if not available_versions:
@@ -83,7 +86,8 @@ async def get_health_status() -> HealthResponse:
     else:
         status = "healthy"
     
-    return HealthResponse(
+    # Trusted registry data; skip validation
+    return HealthResponse.model_construct(
         status=status,
         active_version=active_version,
         available_versions=available_versions,
@@ -91,11 +95,12 @@ async def get_health_status() -> HealthResponse:
     )
 
 
-async def get_model_info(version: str) -> ModelInfoResponse:
-    """Get detailed information about a model version."""
+def _model_info_response(version: str) -> ModelInfoResponse:
+    """Build the info response for a model version."""
     info = model_registry.get_model_info(version)
     
-    return ModelInfoResponse(
+    # Trusted registry data; skip validation
+    return ModelInfoResponse.model_construct(
         version=info["version"],
         exists=info["exists"],
         loaded=info["loaded"],
@@ -106,21 +111,20 @@ async def get_model_info(version: str) -> ModelInfoResponse:
     )
 
 
+async def get_model_info(version: str) -> ModelInfoResponse:
+    """Get detailed information about a model version."""
+    return _model_info_response(version)
+
+
 async def get_all_models_info() -> List[ModelInfoResponse]:
     """Get information about all available models."""
-    available_versions = model_registry.get_available_versions()
-    models_info = []
-    
-    for version in available_versions:
-        info = await get_model_info(version)
-        models_info.append(info)
-    
-    return models_info
+    return [_model_info_response(version) for version in model_registry.get_available_versions()]
 
 
 async def clear_model_cache(version: str = None) -> Dict[str, Any]:
     """Clear model cache for a specific version or all versions."""
     model_registry.clear_cache(version)
+    await response_cache.clear()
     
     return {
         "success": True,
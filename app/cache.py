@@ -0,0 +1,104 @@
+import functools
+import os
+import socket
+from typing import Any, Awaitable, Callable, Optional
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.responses import Response
+
+from .responses import SchemaResponse
+
+
+class ResponseCache:
+    """Optional Redis-backed cache for rendered JSON responses."""
+
+    def __init__(self, prefix: str = "modelswitch"):
+        self._prefix = prefix
+        self._redis: Optional[aioredis.Redis] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether a Redis backend is configured."""
+        return self._redis is not None
+
+    def connect(self, url: str) -> None:
+        """Configure the Redis backend (connections are opened lazily)."""
+        self._redis = aioredis.from_url(url)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get a cached body, or None on a miss or when Redis is unavailable."""
+        if self._redis is None:
+            return None
+        try:
+            return await self._redis.get(f"{self._prefix}:{key}")
+        except RedisError:
+            return None
+
+    async def set(self, key: str, body: bytes, expire: int) -> None:
+        """Cache a body for `expire` seconds."""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(f"{self._prefix}:{key}", body, ex=expire)
+        except RedisError:
+            pass
+
+    async def clear(self) -> None:
+        """Drop every cached response under this cache's prefix."""
+        if self._redis is None:
+            return
+        try:
+            keys = [key async for key in self._redis.scan_iter(match=f"{self._prefix}:*")]
+            if keys:
+                await self._redis.delete(*keys)
+        except RedisError:
+            pass
+
+
+def process_key() -> str:
+    """Identify this process among the replicas sharing a Redis server."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def cached(expire: int) -> Callable:
+    """Cache the JSON body of a parameterless GET endpoint for `expire` seconds.
+
+    Bodies are cached per process, since endpoints report this replica's own
+    registry state. The endpoint runs normally when Redis is disabled or unreachable.
+    """
+
+    def decorator(endpoint: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        name = endpoint.__name__
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            if not response_cache.enabled:
+                return await endpoint(*args, **kwargs)
+
+            # Looked up per call: worker processes may fork after decoration
+            key = f"{process_key()}:{name}"
+            body = await response_cache.get(key)
+            if body is not None:
+                return Response(content=body, media_type="application/json")
+
+            response = await endpoint(*args, **kwargs)
+            if not isinstance(response, Response):
+                response = SchemaResponse(response)
+            if response.status_code == 200:
+                await response_cache.set(key, response.body, expire)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -1,54 +1,148 @@
+import functools
+import json
 import os
-from typing import Optional
-from pydantic import BaseSettings, Field
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Tuple
 
+from dotenv import load_dotenv
 
-class Settings(BaseSettings):
+# Values from a local .env file; variables already set in the environment win
+load_dotenv(".env")
+
+
+def _parse_bool(value: str) -> bool:
+    """Parse a boolean environment value."""
+    value = value.strip().lower()
+    if value in ("1", "true", "yes", "on", "y", "t"):
+        return True
+    if value in ("0", "false", "no", "off", "n", "f", ""):
+        return False
+    raise ValueError(f"Invalid boolean value: {value!r}")
+
+
+def _parse_list(value: str) -> list:
+    """Parse a JSON list (e.g. '["*"]') or a comma-separated environment value."""
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        return [item.strip() for item in value.split(",") if item.strip()]
+    return parsed if isinstance(parsed, list) else [parsed]
+
+
+def _env(name: str, default: Any, parse: Callable[[str], Any] = str) -> Any:
+    """Field read from an environment variable when Settings is instantiated."""
+    def factory() -> Any:
+        value = os.getenv(name)
+        if value is None:
+            return list(default) if isinstance(default, list) else default
+        return parse(value)
+    
+    return field(default_factory=factory)
+
+
+@dataclass(frozen=True)
+class Settings:
     """Application configuration settings."""
     
     # Server settings
-    host: str = Field(default="0.0.0.0", env="HOST")
-    port: int = Field(default=8000, env="PORT")
-    debug: bool = Field(default=False, env="DEBUG")
+    host: str = _env("HOST", "0.0.0.0")
+    port: int = _env("PORT", 8000, int)
+    debug: bool = _env("DEBUG", False, _parse_bool)
     
     # Model settings
-    models_dir: str = Field(default="models", env="MODELS_DIR")
-    default_version: str = Field(default="v1", env="DEFAULT_VERSION")
+    models_dir: str = _env("MODELS_DIR", "models")
+    default_version: str = _env("DEFAULT_VERSION", "v1")
+    preload_models: bool = _env("PRELOAD_MODELS", True, _parse_bool)
+    
+    # Prediction batching settings
+    batch_max_size: int = _env("BATCH_MAX_SIZE", 64, int)
+    batch_max_wait_ms: float = _env("BATCH_MAX_WAIT_MS", 8.0, float)
     
     # Redis settings (optional)
-    redis_url: Optional[str] = Field(default=None, env="REDIS_URL")
-    redis_enabled: bool = Field(default=False, env="REDIS_ENABLED")
+    redis_url: Optional[str] = _env("REDIS_URL", None)
+    redis_enabled: bool = _env("REDIS_ENABLED", False, _parse_bool)
     
     # Monitoring settings
-    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
-    prometheus_port: int = Field(default=9090, env="PROMETHEUS_PORT")
+    metrics_enabled: bool = _env("METRICS_ENABLED", True, _parse_bool)
+    prometheus_port: int = _env("PROMETHEUS_PORT", 9090, int)
     
     # CORS settings
-    cors_origins: list = Field(default=["*"], env="CORS_ORIGINS")
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    cors_origins: list = _env("CORS_ORIGINS", ["*"], _parse_list)
 
 
 # Global settings instance
 settings = Settings()
 
+# Longest a models directory scan is reused while the directory mtime is unchanged.
+# Adding model.pkl to an existing version directory doesn't touch the models
+# directory's mtime, so those changes are only seen once the scan expires.
+VERSIONS_CACHE_TTL = 2.0
+
+# (scan timestamp, models_dir, models_dir mtime_ns, versions) of the last scan
+_versions_cache: Optional[Tuple[float, str, Optional[int], list[str]]] = None
+
 
 def get_model_path(version: str) -> str:
     """Get the full path to a model version."""
-    return os.path.join(settings.models_dir, version, "model.pkl")
+    return _model_file_path(settings.models_dir, version, "model.pkl")
+
+
+def get_onnx_model_path(version: str) -> str:
+    """Get the full path to the optional ONNX export of a model version."""
+    return _model_file_path(settings.models_dir, version, "model.onnx")
+
+
+@functools.lru_cache(maxsize=128)
+def _model_file_path(models_dir: str, version: str, filename: str) -> str:
+    """Join a model file path; keyed on models_dir so a new directory can't hit stale paths."""
+    return os.path.join(models_dir, version, filename)
 
 
 def get_available_versions() -> list[str]:
     """Get list of available model versions."""
-    if not os.path.exists(settings.models_dir):
-        return []
+    global _versions_cache
+    
+    now = time.monotonic()
+    models_dir = settings.models_dir
+    
+    # One stat instead of a full scan; a missing directory is cached as None
+    try:
+        mtime_ns = os.stat(models_dir).st_mtime_ns
+    except OSError:
+        mtime_ns = None
     
+    if _versions_cache is not None:
+        scanned_at, cached_dir, cached_mtime_ns, versions = _versions_cache
+        if (
+            cached_dir == models_dir
+            and cached_mtime_ns == mtime_ns
+            and now - scanned_at < VERSIONS_CACHE_TTL
+        ):
+            return list(versions)
+    
+    versions = _scan_versions(models_dir) if mtime_ns is not None else []
+    _versions_cache = (now, models_dir, mtime_ns, versions)
+    return list(versions)
+
+
+def clear_versions_cache() -> None:
+    """Forget the cached models directory scan."""
+    global _versions_cache
+    _versions_cache = None
+
+
+def _scan_versions(models_dir: str) -> list[str]:
+    """Scan the models directory for versions that contain a model file."""
+    # DirEntry.is_dir() comes from the directory listing itself (symlinked
+    # versions aside), so stray files are skipped without a stat.
     versions = []
-    for item in os.listdir(settings.models_dir):
-        model_path = get_model_path(item)
-        if os.path.exists(model_path):
-            versions.append(item)
+    try:
+        with os.scandir(models_dir) as entries:
+            for entry in entries:
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, "model.pkl")):
+                    versions.append(entry.name)
+    except FileNotFoundError:
+        return []
     
     return sorted(versions) 
\ No newline at end of file
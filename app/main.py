@@ -1,10 +1,14 @@
+import asyncio
+
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from starlette.responses import Response
 
 from .config import settings
+from .responses import SchemaResponse
+from .cache import cached, response_cache
 from .predict import PredictionRequest, PredictionResponse, predict_with_validation
 from .admin import (
     VersionRequest, VersionResponse, HealthResponse, ModelInfoResponse,
@@ -19,7 +23,8 @@ app = FastAPI(
     description="A lightweight machine learning model serving API with version control and rollback capability",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -53,7 +58,7 @@ async def predict(request: PredictionRequest):
     - **version**: Optional model version override (e.g., "v2")
     """
     try:
-        return await predict_with_validation(request)
+        return SchemaResponse(await predict_with_validation(request))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except RuntimeError as e:
@@ -67,10 +72,11 @@ async def admin_set_active_version(request: VersionRequest):
     
     - **version**: Model version to activate (e.g., "v2")
     """
-    return await set_active_version(request)
+    return SchemaResponse(await set_active_version(request))
 
 
 @app.get("/admin/active-version")
+@cached(expire=10)
 async def admin_get_active_version():
     """Get the currently active model version."""
     return {
@@ -80,15 +86,16 @@ async def admin_get_active_version():
 
 
 @app.get("/admin/models", response_model=list[ModelInfoResponse])
+@cached(expire=10)
 async def admin_get_models_info():
     """Get detailed information about all available models."""
-    return await get_all_models_info()
+    return SchemaResponse(await get_all_models_info())
 
 
 @app.get("/admin/models/{version}", response_model=ModelInfoResponse)
 async def admin_get_model_info(version: str):
     """Get detailed information about a specific model version."""
-    return await get_model_info(version)
+    return SchemaResponse(await get_model_info(version))
 
 
 @app.post("/admin/cache/clear")
@@ -100,7 +107,7 @@ async def admin_clear_cache(version: str = Query(None, description="Version to c
 @app.get("/healthz", response_model=HealthResponse)
 async def health_check():
     """Health check endpoint."""
-    return await get_health_status()
+    return SchemaResponse(await get_health_status())
 
 
 @app.get("/metrics")
@@ -118,7 +125,7 @@ async def metrics():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"error": "Internal server error", "detail": str(exc)}
     )
@@ -132,12 +139,28 @@ async def startup_event():
     import os
     os.makedirs(settings.models_dir, exist_ok=True)
     
-    # Load the default model if it exists
-    try:
-        model_registry.get_model()
-    except FileNotFoundError:
-        # This is expected if no models are available yet
-        pass
+    if settings.preload_models:
+        # Load every available version concurrently in worker threads so disk
+        # reads overlap and first requests for any version skip the load
+        await asyncio.to_thread(model_registry.warm_all)
+    else:
+        # Load the default model if it exists
+        try:
+            model_registry.get_model()
+        except FileNotFoundError:
+            # This is expected if no models are available yet
+            pass
+    
+    # Enable the shared response cache if Redis is configured
+    if settings.redis_enabled and settings.redis_url:
+        response_cache.connect(settings.redis_url)
+
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release resources on shutdown."""
+    await response_cache.close()
 
 
 if __name__ == "__main__":
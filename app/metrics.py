@@ -1,5 +1,5 @@
 from prometheus_client import Counter, Histogram, Gauge
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
 
 
 # Metrics for model inference
@@ -34,29 +34,53 @@ MODEL_LOAD_TIME = Histogram(
 )
 
 
+# Label children resolved once per label set, so the prediction hot path skips
+# the parent metric's lock and label lookup on every call
+_LATENCY_CHILDREN: Dict[Tuple[str, ...], Any] = {}
+_REQUEST_CHILDREN: Dict[Tuple[str, ...], Any] = {}
+_ERROR_CHILDREN: Dict[Tuple[str, ...], Any] = {}
+_ACTIVE_CHILDREN: Dict[Tuple[str, ...], Any] = {}
+
+
+def _child(children: Dict[Tuple[str, ...], Any], metric: Any, *labels: str) -> Any:
+    """Get the cached child of a labelled metric, resolving it on first use."""
+    child = children.get(labels)
+    if child is None:
+        child = children[labels] = metric.labels(*labels)
+    return child
+
+
+def warm_version_metrics(versions: Iterable[str]):
+    """Pre-resolve the per-version metric children for known versions."""
+    for version in versions:
+        _child(_LATENCY_CHILDREN, MODEL_INFERENCE_LATENCY, version)
+        _child(_REQUEST_CHILDREN, MODEL_PREDICTION_REQUESTS, version, "success")
+        _child(_ACTIVE_CHILDREN, MODEL_VERSION_ACTIVE, version)
+
+
 def record_inference_latency(version: str, duration: float):
     """Record inference latency for a model version."""
-    MODEL_INFERENCE_LATENCY.labels(model_version=version).observe(duration)
+    _child(_LATENCY_CHILDREN, MODEL_INFERENCE_LATENCY, version).observe(duration)
 
 
 def record_prediction_request(version: str, status: str = "success"):
     """Record a prediction request."""
-    MODEL_PREDICTION_REQUESTS.labels(model_version=version, status=status).inc()
+    _child(_REQUEST_CHILDREN, MODEL_PREDICTION_REQUESTS, version, status).inc()
 
 
 def record_prediction_error(version: str, error_type: str):
     """Record a prediction error."""
-    MODEL_PREDICTION_ERRORS.labels(model_version=version, error_type=error_type).inc()
+    _child(_ERROR_CHILDREN, MODEL_PREDICTION_ERRORS, version, error_type).inc()
 
 
 def set_active_version(version: str):
     """Set the currently active model version."""
-    # Reset all versions to 0
-    for v in ["v1", "v2", "v3", "v4", "v5"]:  # Common version names
-        MODEL_VERSION_ACTIVE.labels(version=v).set(0)
+    # Reset every version seen so far to 0
+    for child in list(_ACTIVE_CHILDREN.values()):
+        child.set(0)
     
     # Set the active version to 1
-    MODEL_VERSION_ACTIVE.labels(version=version).set(1)
+    _child(_ACTIVE_CHILDREN, MODEL_VERSION_ACTIVE, version).set(1)
 
 
 def record_model_load_time(version: str, duration: float):
@@ -1,11 +1,43 @@
+import asyncio
 import os
+import threading
 import time
 import joblib
-from typing import Dict, Optional, Any
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Any, Tuple
 from pathlib import Path
 
-from .config import settings, get_model_path, get_available_versions
-from .metrics import record_model_load_time, set_active_version
+try:
+    import onnxruntime
+except ImportError:  # Optional dependency
+    onnxruntime = None
+
+from .config import (
+    settings, get_model_path, get_onnx_model_path, get_available_versions, clear_versions_cache
+)
+from .metrics import record_model_load_time, set_active_version, warm_version_metrics
+
+# How long a model file's stat() result is reused by get_model_info
+MODEL_INFO_CACHE_TTL = 1.0
+
+
+class OnnxModel:
+    """Serves an ONNX export of a model through a scikit-learn style predict()."""
+    
+    def __init__(self, path: str):
+        self._session = onnxruntime.InferenceSession(path, providers=["CPUExecutionProvider"])
+        self._input_name = self._session.get_inputs()[0].name
+    
+    def predict(self, X: Any) -> np.ndarray:
+        """Run inference; the first graph output holds the predictions."""
+        features = np.asarray(X, dtype=np.float32)
+        predictions = self._session.run(None, {self._input_name: features})[0]
+        
+        # Regressors are exported with an (n, 1) output; match scikit-learn's (n,)
+        if predictions.ndim == 2 and predictions.shape[1] == 1:
+            predictions = predictions.ravel()
+        return predictions
 
 
 class ModelRegistry:
@@ -16,29 +48,96 @@ class ModelRegistry:
         self._active_version: str = settings.default_version
         self._load_times: Dict[str, float] = {}
         
+        # Per-version locks serialize loads; _dict_lock guards the lock table
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._dict_lock = threading.Lock()
+        
+        # model path -> (stat timestamp, stat result) for existing model files
+        self._stat_cache: Dict[str, Tuple[float, os.stat_result]] = {}
+        
+        # Runs disk loads for async callers off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="model-load")
+        
         # Set initial active version in metrics
         set_active_version(self._active_version)
+        warm_version_metrics(get_available_versions())
     
     def get_model(self, version: Optional[str] = None) -> Any:
         """Get a model instance, loading it if necessary."""
         version = version or self._active_version
         
-        if version not in self._models:
-            self._load_model(version)
+        # Fast path: cache hits don't take any lock
+        model = self._models.get(version)
+        if model is not None:
+            return model
+        
+        with self._dict_lock:
+            load_lock = self._load_locks.setdefault(version, threading.Lock())
+        
+        with load_lock:
+            # Another thread may have loaded it while we waited
+            model = self._models.get(version)
+            if model is not None:
+                return model
+            
+            try:
+                return self._load_model(version)
+            except Exception:
+                # Don't keep locks around for versions that failed to load
+                with self._dict_lock:
+                    self._load_locks.pop(version, None)
+                raise
+    
+    async def aget_model(self, version: Optional[str] = None) -> Any:
+        """Async get_model: cold loads run in a thread pool, off the event loop."""
+        version = version or self._active_version
+        
+        model = self._models.get(version)
+        if model is not None:
+            return model
         
-        return self._models[version]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get_model, version)
     
-    def _load_model(self, version: str) -> None:
-        """Load a model from disk and cache it."""
+    def warm_all(self) -> list[str]:
+        """Load every available version in parallel; returns the versions loaded.
+        
+        joblib releases the GIL during file reads, so total warm-up time is
+        close to the slowest single load rather than the sum of them.
+        """
+        versions = get_available_versions()
+        
+        def load(version: str) -> bool:
+            try:
+                self.get_model(version)
+                return True
+            except Exception:
+                # A broken version shouldn't stop the others from loading
+                return False
+        
+        loaded = list(self._executor.map(load, versions))
+        return [version for version, ok in zip(versions, loaded) if ok]
+    
+    def _load_model(self, version: str) -> Any:
+        """Load a model from disk, cache it and return it."""
         model_path = get_model_path(version)
         
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"Model not found: {model_path}")
         
+        onnx_path = get_onnx_model_path(version)
         start_time = time.time()
         
         try:
-            model = joblib.load(model_path)
+            if onnxruntime is not None and os.path.exists(onnx_path):
+                # Prefer the ONNX export: native inference that releases the GIL
+                model = OnnxModel(onnx_path)
+            else:
+                # No mmap_mode: tree ensembles (the example models) keep their nodes
+                # in Cython tree objects rather than plain ndarrays, so there is
+                # nothing for mmap to share, and an estimator that writes to its
+                # arrays at predict time fails on read-only maps long after load.
+                model = joblib.load(model_path)
             self._models[version] = model
             self._load_times[version] = time.time() - start_time
             
@@ -47,6 +146,8 @@ class ModelRegistry:
             
         except Exception as e:
             raise RuntimeError(f"Failed to load model {version}: {str(e)}")
+        
+        return model
     
     def set_active_version(self, version: str) -> bool:
         """Set the active model version."""
@@ -57,6 +158,7 @@ class ModelRegistry:
         
         self._active_version = version
         set_active_version(version)
+        clear_versions_cache()
         return True
     
     def get_active_version(self) -> str:
@@ -71,37 +173,61 @@ class ModelRegistry:
         """Check if a model version is loaded in memory."""
         return version in self._models
     
+    def loaded_versions(self) -> set[str]:
+        """Get the set of model versions loaded in memory."""
+        return set(self._models)
+    
     def get_load_time(self, version: str) -> Optional[float]:
         """Get the load time for a model version."""
         return self._load_times.get(version)
     
     def clear_cache(self, version: Optional[str] = None) -> None:
         """Clear model cache for a specific version or all versions."""
+        clear_versions_cache()
         if version:
             self._models.pop(version, None)
             self._load_times.pop(version, None)
+            self._stat_cache.pop(get_model_path(version), None)
         else:
             self._models.clear()
             self._load_times.clear()
+            self._stat_cache.clear()
     
     def get_model_info(self, version: str) -> Dict[str, Any]:
         """Get information about a model version."""
         model_path = get_model_path(version)
+        stat = self._stat_model_file(model_path)
         
         info = {
             "version": version,
-            "exists": os.path.exists(model_path),
+            "exists": stat is not None,
             "loaded": version in self._models,
             "load_time": self._load_times.get(version),
             "active": version == self._active_version
         }
         
-        if os.path.exists(model_path):
-            stat = os.stat(model_path)
+        if stat is not None:
             info["file_size"] = stat.st_size
             info["modified_time"] = stat.st_mtime
         
         return info
+    
+    def _stat_model_file(self, model_path: str) -> Optional[os.stat_result]:
+        """Stat a model file, reusing results younger than MODEL_INFO_CACHE_TTL."""
+        now = time.monotonic()
+        cached = self._stat_cache.get(model_path)
+        if cached is not None and now - cached[0] < MODEL_INFO_CACHE_TTL:
+            return cached[1]
+        
+        try:
+            stat = os.stat(model_path)
+        except OSError:
+            # Missing files aren't cached, so arbitrary versions can't grow the cache
+            self._stat_cache.pop(model_path, None)
+            return None
+        
+        self._stat_cache[model_path] = (now, stat)
+        return stat
 
 
 # Global model registry instance
@@ -1,9 +1,18 @@
+import asyncio
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from typing import List, Union, Optional
+from typing import Any, Dict, List, Union, Optional
 from pydantic import BaseModel, Field
+from sklearn.ensemble import (
+    ExtraTreesClassifier, ExtraTreesRegressor, GradientBoostingClassifier,
+    GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+)
+from sklearn.tree import BaseDecisionTree
 
-from .model_loader import model_registry
+from .config import settings
+from .model_loader import OnnxModel, model_registry
 from .metrics import record_inference_latency, record_prediction_request, record_prediction_error
 
 
@@ -20,40 +29,192 @@ class PredictionResponse(BaseModel):
     latency_ms: float = Field(..., description="Inference latency in milliseconds")
 
 
+class InvalidFeaturesError(ValueError):
+    """Features the model being served can't take."""
+
+
 class PredictionError(BaseModel):
     """Error response schema."""
     error: str = Field(..., description="Error message")
     model_version: Optional[str] = Field(None, description="Model version if available")
 
 
+class BatchingPredictor:
+    """Coalesces concurrent predictions for a model version into one predict call.
+    
+    The first request for a version opens a batch that is flushed after
+    `max_wait` seconds, or as soon as it holds `max_batch_size` requests.
+    Batches run in a thread pool so inference doesn't block the event loop.
+    """
+    
+    def __init__(self, max_batch_size: int, max_wait: float, max_workers: int = 4):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        # (event loop, version) -> (pending items, flush timer). Batches are kept
+        # per loop because futures and timers belong to the loop that made them.
+        self._pending: Dict[tuple, tuple] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="predict")
+        # Running batch tasks, referenced until done so they aren't garbage collected
+        self._tasks: set = set()
+    
+    async def predict(self, version: str, model: Any, features: List[Union[float, int]]) -> Any:
+        """Queue a feature vector and wait for its row of the batch prediction."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        key = (loop, version)
+        pending = self._pending.get(key)
+        if pending is None:
+            batch = []
+            timer = loop.call_later(self.max_wait, self._flush, key, batch)
+            self._pending[key] = (batch, timer)
+        else:
+            batch = pending[0]
+        
+        batch.append((model, features, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key, batch)
+        
+        return await future
+    
+    def _flush(self, key: tuple, batch: list) -> None:
+        """Hand a pending batch over to the thread pool."""
+        pending = self._pending.get(key)
+        if pending is None or pending[0] is not batch:
+            return  # Already flushed
+        del self._pending[key]
+        pending[1].cancel()
+        
+        task = key[0].create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run_batch(self, batch: list) -> None:
+        """Run one predict call for a batch in the pool and resolve its futures."""
+        model = batch[0][0]
+        rows = [features for _, features, _ in batch]
+        
+        try:
+            outcomes = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _predict_batch, model, rows
+            )
+        except Exception as e:
+            outcomes = [(None, e)] * len(batch)
+        
+        for (_, _, future), (result, error) in zip(batch, outcomes):
+            _resolve(future, result=result, exception=error)
+
+
+# Models that convert their input to float32 themselves (scikit-learn's tree
+# thresholds are float32); every other model gets float64 features
+_FLOAT32_MODELS = (
+    OnnxModel, BaseDecisionTree, RandomForestClassifier, RandomForestRegressor,
+    ExtraTreesClassifier, ExtraTreesRegressor, GradientBoostingClassifier,
+    GradientBoostingRegressor
+)
+
+
+def uses_float32(model: Any) -> bool:
+    """Check whether a model consumes its features as float32."""
+    return isinstance(model, _FLOAT32_MODELS)
+
+
+# Per-thread scratch buffers (one per dtype) that batched feature rows are copied into
+_buffers = threading.local()
+
+
+def _feature_buffer(n_rows: int, n_features: int, dtype: type) -> np.ndarray:
+    """Get an (n_rows, n_features) view of this thread's scratch buffer for `dtype`."""
+    buffers = getattr(_buffers, "features", None)
+    if buffers is None:
+        buffers = _buffers.features = {}
+    buffer = buffers.get(dtype)
+    if buffer is None or buffer.shape[0] < n_rows or buffer.shape[1] != n_features:
+        buffer = np.empty((max(n_rows, settings.batch_max_size), n_features), dtype=dtype)
+        buffers[dtype] = buffer
+    return buffer[:n_rows]
+
+
+def _predict_batch(model: Any, rows: List[List[Union[float, int]]]) -> List[tuple]:
+    """Predict a batch, returning a (result, exception) outcome per row."""
+    try:
+        return [(result, None) for result in _predict_rows(model, rows)]
+    except Exception as e:
+        if len(rows) == 1:
+            return [(None, e)]
+    
+    # Don't let one bad request fail the whole batch
+    outcomes = []
+    for features in rows:
+        try:
+            outcomes.append((_predict_rows(model, [features])[0], None))
+        except Exception as e:
+            outcomes.append((None, e))
+    return outcomes
+
+
+def _predict_rows(model: Any, rows: List[List[Union[float, int]]]) -> list:
+    """Predict a batch of feature vectors and split the output per row."""
+    # Trees and ONNX models get float32 so they skip their own conversion copy;
+    # ragged or non-numeric rows raise ValueError here.
+    dtype = np.float32 if uses_float32(model) else np.float64
+    features = _feature_buffer(len(rows), len(rows[0]), dtype)
+    features[...] = rows
+    predictions = model.predict(features)
+    
+    # Handle different prediction formats
+    if hasattr(predictions, 'tolist'):
+        predictions = predictions.tolist()
+    if len(rows) == 1:
+        return [predictions[0] if len(predictions) == 1 else predictions]
+    if len(predictions) != len(rows):
+        raise ValueError(f"Expected {len(rows)} predictions, got {len(predictions)}")
+    return predictions
+
+
+def _resolve(
+    future: asyncio.Future, result: Any = None, exception: Optional[Exception] = None
+) -> None:
+    """Complete a future unless its request has already gone away."""
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+
+# Global batching predictor instance
+batching_predictor = BatchingPredictor(
+    max_batch_size=settings.batch_max_size,
+    max_wait=settings.batch_max_wait_ms / 1000
+)
+
+
 async def make_prediction(request: PredictionRequest) -> PredictionResponse:
     """Make a prediction using the specified or active model version."""
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     
     try:
         # Determine which version to use
         version = request.version or model_registry.get_active_version()
         
-        # Get the model
-        model = model_registry.get_model(version)
+        # Get the model (cold loads run in the registry's thread pool)
+        model = await model_registry.aget_model(version)
         
-        # Prepare features
-        features = np.array(request.features).reshape(1, -1)
+        # Finite values beyond float32's range would become inf in the model's input
+        if uses_float32(model) and not validate_features(request.features, float32=True):
+            raise InvalidFeaturesError("Invalid features provided: out of float32 range")
         
-        # Make prediction
-        prediction = model.predict(features)
+        # Make prediction (batched with concurrent requests for this version)
+        prediction = await batching_predictor.predict(version, model, request.features)
         
-        # Handle different prediction formats
-        if hasattr(prediction, 'tolist'):
-            prediction = prediction.tolist()
-        if len(prediction) == 1:
-            prediction = prediction[0]
-        
-        # Calculate latency
-        latency_ms = (time.time() - start_time) * 1000
+        # Calculate latency (monotonic clock, integer nanoseconds)
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        latency_ms = elapsed_ns / 1_000_000
         
         # Record metrics
-        record_inference_latency(version, latency_ms / 1000)  # Convert to seconds for Prometheus
+        record_inference_latency(version, elapsed_ns / 1e9)  # Seconds for Prometheus
         record_prediction_request(version, "success")
         
         return PredictionResponse(
@@ -66,29 +227,60 @@ async def make_prediction(request: PredictionRequest) -> PredictionResponse:
         record_prediction_error(version, "model_not_found")
         raise ValueError(f"Model version '{version}' not found")
         
+    except InvalidFeaturesError:
+        raise
+        
     except Exception as e:
         error_type = type(e).__name__
         record_prediction_error(version, error_type)
         raise RuntimeError(f"Prediction failed: {str(e)}")
 
 
-def validate_features(features: List[Union[float, int]]) -> bool:
-    """Validate input features."""
+# Feature vectors up to this length are checked in pure Python, where
+# np.asarray's conversion overhead outweighs the vectorized check
+SMALL_FEATURES_MAX = 8
+
+# Ints NumPy stores as int64; larger ones are left to the NumPy path, which
+# rejects those that don't fit a numeric dtype (they'd overflow the feature cast)
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+
+def _is_plain_number(x: Any) -> bool:
+    """Check for a float or an int that NumPy would store as int64."""
+    return type(x) is float or (type(x) is int and _INT64_MIN <= x <= _INT64_MAX)
+
+
+# Largest magnitude a float32 feature can hold
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def validate_features(features: List[Union[float, int]], float32: bool = False) -> bool:
+    """Validate input features (also within float32's range if `float32` is set)."""
     if not features:
         return False
     
-    # Check for valid numeric values
-    for feature in features:
-        if not isinstance(feature, (int, float)) or np.isnan(feature) or np.isinf(feature):
-            return False
+    if len(features) <= SMALL_FEATURES_MAX and all(_is_plain_number(x) for x in features):
+        if float32:
+            return all(abs(x) <= _FLOAT32_MAX for x in features)
+        # x - x is 0 for finite numbers and NaN for NaN and +/-inf
+        return all(x - x == 0 for x in features)
+    
+    # Non-numeric entries (strings, None, nested lists) give a non-numeric
+    # dtype or extra dimensions; NaN/inf are caught in one vectorized pass.
+    array = np.asarray(features)
+    if array.ndim != 1 or array.dtype.kind not in "biuf":
+        return False
     
-    return True
+    if float32:
+        return bool((np.abs(array) <= _FLOAT32_MAX).all())
+    return bool(np.isfinite(array).all())
 
 
 async def predict_with_validation(request: PredictionRequest) -> PredictionResponse:
     """Make a prediction with input validation."""
     # Validate features
     if not validate_features(request.features):
-        raise ValueError("Invalid features provided")
+        raise InvalidFeaturesError("Invalid features provided")
     
     return await make_prediction(request) 
\ No newline at end of file
@@ -0,0 +1,19 @@
+from typing import Any
+
+import pydantic_core
+from starlette.responses import JSONResponse
+
+
+class SchemaResponse(JSONResponse):
+    """JSON response that encodes Pydantic schemas directly with pydantic-core.
+
+    Skips the ``jsonable_encoder`` + ``json.dumps`` round trip: models, lists of
+    models and plain JSON-compatible values are serialized to bytes in one pass.
+
+    Endpoints whose payloads are built in-process from trusted data return an
+    instance directly, which also skips FastAPI's outbound validation against
+    ``response_model``; the declared model is then only used for OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
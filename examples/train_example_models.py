@@ -3,6 +3,7 @@
 Example script to train and save models for ModelSwitch testing.
 """
 
+import argparse
 import os
 import joblib
 import numpy as np
@@ -98,7 +99,23 @@ def train_regression_model(version: str, n_samples: int = 1000, n_features: int
     return model
 
 
-def main():
+def export_onnx_model(model, version: str, n_features: int):
+    """Export a trained model to ONNX next to its pickle (requires skl2onnx)."""
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    
+    onnx_model = convert_sklearn(
+        model,
+        initial_types=[("float_input", FloatTensorType([None, n_features]))]
+    )
+    
+    onnx_path = f"models/{version}/model.onnx"
+    with open(onnx_path, "wb") as f:
+        f.write(onnx_model.SerializeToString())
+    print(f"  ONNX model saved to: {onnx_path}")
+
+
+def main(export_onnx: bool = False):
     """Train example models for different versions."""
     print("Training example models for ModelSwitch...")
     
@@ -106,9 +123,16 @@ def main():
     create_models_directory()
     
     # Train different model types for different versions
-    train_classification_model("v1", n_samples=1000, n_features=10)
-    train_classification_model("v2", n_samples=1500, n_features=12)
-    train_regression_model("v3", n_samples=1000, n_features=8)
+    models = [
+        ("v1", train_classification_model("v1", n_samples=1000, n_features=10), 10),
+        ("v2", train_classification_model("v2", n_samples=1500, n_features=12), 12),
+        ("v3", train_regression_model("v3", n_samples=1000, n_features=8), 8),
+    ]
+    
+    if export_onnx:
+        print("\nExporting models to ONNX...")
+        for version, model, n_features in models:
+            export_onnx_model(model, version, n_features)
     
     print("\nTraining complete! Models saved to:")
     for version in ["v1", "v2", "v3"]:
@@ -124,4 +148,12 @@ def main():
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train example models for ModelSwitch.")
+    parser.add_argument(
+        "--export-onnx",
+        action="store_true",
+        help="Also export each model to ONNX for serving with onnxruntime (requires skl2onnx)"
+    )
+    args = parser.parse_args()
+    
+    main(export_onnx=args.export_onnx) 
\ No newline at end of file
@@ -3,10 +3,12 @@
 Setup script to help users get ModelSwitch up and running quickly.
 """
 
+import functools
 import os
 import sys
 import subprocess
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
@@ -49,6 +51,12 @@ def print_warning(text):
     print(f"{Colors.WARNING}⚠ {text}{Colors.ENDC}")
 
 
+def confirm(question):
+    """Ask a yes/no question."""
+    response = input(f"{Colors.OKCYAN}{question} (y/n): {Colors.ENDC}")
+    return response.lower() in ['y', 'yes']
+
+
 def check_python_version():
     """Check if Python version is 3.11 or higher."""
     print_info("Checking Python version...")
@@ -60,16 +68,40 @@ def check_python_version():
     return True
 
 
+# Top-level entries setup cares about, snapshotted once by snapshot_paths()
+_SETUP_PATHS = ("venv", ".env", "models", "env.example")
+_path_exists_cache = {}
+
+
+def snapshot_paths():
+    """Record which setup paths exist with a single directory scan."""
+    with os.scandir(".") as entries:
+        present = {entry.name for entry in entries}
+    for name in _SETUP_PATHS:
+        _path_exists_cache[name] = name in present
+
+
+def path_exists(name):
+    """Check if a setup path exists, using the snapshot when available."""
+    if name not in _path_exists_cache:
+        _path_exists_cache[name] = Path(name).exists()
+    return _path_exists_cache[name]
+
+
+@functools.lru_cache(maxsize=None)
 def check_command_exists(command):
     """Check if a command exists in PATH."""
     try:
         subprocess.run(
             [command, "--version"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=False
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=False,
+            timeout=2
         )
         return True
+    except subprocess.TimeoutExpired:
+        return True  # It started, so it exists; it's just slow to answer
     except FileNotFoundError:
         return False
 
@@ -78,13 +110,13 @@ def create_virtual_environment():
     """Create a Python virtual environment."""
     print_info("Creating virtual environment...")
     
-    venv_path = Path("venv")
-    if venv_path.exists():
+    if path_exists("venv"):
         print_warning("Virtual environment already exists")
         return True
     
     try:
         subprocess.run([sys.executable, "-m", "venv", "venv"], check=True)
+        _path_exists_cache["venv"] = True
         print_success("Virtual environment created")
         return True
     except subprocess.CalledProcessError:
@@ -92,6 +124,11 @@ def create_virtual_environment():
         return False
 
 
+# Oldest pip that setup leaves alone instead of upgrading
+MIN_PIP = (23, 0)
+
+
+@functools.lru_cache(maxsize=None)
 def get_pip_command():
     """Get the appropriate pip command based on OS."""
     if platform.system() == "Windows":
@@ -99,42 +136,57 @@ def get_pip_command():
     return os.path.join("venv", "bin", "pip")
 
 
-def install_dependencies():
-    """Install Python dependencies."""
+@functools.lru_cache(maxsize=None)
+def pip_is_current():
+    """Check if the venv's pip is at least MIN_PIP, without a network round trip."""
+    try:
+        output = subprocess.check_output([get_pip_command(), "--version"], text=True)
+        # "pip 24.2 from /path/to/site-packages/pip (python 3.11)"
+        version = tuple(int(part) for part in output.split()[1].split(".")[:2])
+    except (OSError, subprocess.CalledProcessError, IndexError, ValueError):
+        return False
+    return version >= MIN_PIP
+
+
+def install_dependencies(dev=False, pre_commit=False):
+    """Install Python dependencies.
+    
+    Everything goes through a single pip run so interpreter startup and
+    dependency resolution are paid once.
+    """
     print_info("Installing dependencies...")
     
-    pip_cmd = get_pip_command()
+    command = [get_pip_command(), "install"]
+    if not pip_is_current():
+        command += ["--upgrade", "pip"]
+    command += ["-r", "requirements.txt"]
+    if dev:
+        command += ["-r", "requirements-dev.txt"]
+    if pre_commit:
+        command.append("pre-commit")
     
     try:
-        # Upgrade pip
-        subprocess.run([pip_cmd, "install", "--upgrade", "pip"], check=True)
-        
-        # Install main dependencies
-        subprocess.run([pip_cmd, "install", "-r", "requirements.txt"], check=True)
+        subprocess.run(command, check=True)
         print_success("Main dependencies installed")
-        
-        # Ask if user wants dev dependencies
-        response = input(f"\n{Colors.OKCYAN}Install development dependencies? (y/n): {Colors.ENDC}")
-        if response.lower() in ['y', 'yes']:
-            subprocess.run([pip_cmd, "install", "-r", "requirements-dev.txt"], check=True)
+        if dev:
             print_success("Development dependencies installed")
-        
         return True
     except subprocess.CalledProcessError:
         print_error("Failed to install dependencies")
         return False
 
 
-def setup_environment_file():
+def setup_environment_file(overwrite=False):
     """Create .env file from template."""
     print_info("Setting up environment file...")
     
-    env_path = Path(".env")
-    if env_path.exists():
+    if path_exists(".env") and not overwrite:
         print_warning(".env file already exists")
-        response = input(f"{Colors.OKCYAN}Overwrite? (y/n): {Colors.ENDC}")
-        if response.lower() not in ['y', 'yes']:
-            return True
+        return True
+    
+    if not path_exists("env.example"):
+        print_error("env.example template not found")
+        return False
     
     try:
         # Copy env.example to .env
@@ -143,6 +195,7 @@ def setup_environment_file():
         
         with open(".env", "w") as dst:
             dst.write(content)
+        _path_exists_cache[".env"] = True
         
         print_success(".env file created")
         return True
@@ -156,7 +209,7 @@ def create_models_directory():
     print_info("Creating models directory...")
     
     models_dir = Path("models")
-    if models_dir.exists():
+    if path_exists("models"):
         print_warning("Models directory already exists")
         return True
     
@@ -164,6 +217,7 @@ def create_models_directory():
         models_dir.mkdir()
         (models_dir / "v1").mkdir()
         (models_dir / "v2").mkdir()
+        _path_exists_cache["models"] = True
         print_success("Models directory created")
         return True
     except Exception as e:
@@ -180,11 +234,29 @@ def train_example_models():
         print_info("Skipping model training")
         return True
     
-    python_cmd = sys.executable if not Path("venv").exists() else (
+    python_cmd = sys.executable if not path_exists("venv") else (
         os.path.join("venv", "Scripts", "python.exe") if platform.system() == "Windows"
         else os.path.join("venv", "bin", "python")
     )
     
+    # Already running the target interpreter: skip starting another one
+    if os.path.abspath(python_cmd) == os.path.abspath(sys.executable):
+        try:
+            sys.path.insert(0, "examples")
+            import train_example_models as trainer
+        except ImportError:
+            pass  # Training dependencies missing here; let the subprocess report it
+        else:
+            try:
+                trainer.main()
+                print_success("Example models trained")
+                return True
+            except Exception as e:
+                print_error(f"Failed to train example models: {e}")
+                return False
+        finally:
+            sys.path.remove("examples")
+    
     try:
         subprocess.run([python_cmd, "examples/train_example_models.py"], check=True)
         print_success("Example models trained")
@@ -195,18 +267,10 @@ def train_example_models():
 
 
 def setup_pre_commit():
-    """Setup pre-commit hooks."""
+    """Setup pre-commit hooks (pre-commit is installed by install_dependencies)."""
     print_info("Setting up pre-commit hooks...")
     
-    response = input(f"{Colors.OKCYAN}Install pre-commit hooks? (y/n): {Colors.ENDC}")
-    if response.lower() not in ['y', 'yes']:
-        print_info("Skipping pre-commit setup")
-        return True
-    
-    pip_cmd = get_pip_command()
-    
     try:
-        subprocess.run([pip_cmd, "install", "pre-commit"], check=True)
         subprocess.run(["pre-commit", "install"], check=True)
         print_success("Pre-commit hooks installed")
         return True
@@ -215,11 +279,11 @@ def setup_pre_commit():
         return False
 
 
-def check_docker():
-    """Check if Docker is available."""
+def check_docker(docker_installed):
+    """Ask whether to use Docker, given the result of the Docker probe."""
     print_info("Checking for Docker...")
     
-    if check_command_exists("docker"):
+    if docker_installed:
         print_success("Docker is installed")
         
         response = input(f"{Colors.OKCYAN}Would you like to use Docker? (y/n): {Colors.ENDC}")
@@ -276,28 +340,43 @@ def main():
     if not check_python_version():
         sys.exit(1)
     
+    # Stat the project directory once instead of probing each path separately
+    snapshot_paths()
+    
+    # Ask interactive questions on the main thread before background work starts
+    overwrite_env = path_exists(".env") and confirm(".env file already exists. Overwrite?")
+    
+    # Probe for Docker, set up the environment file and create the models
+    # directory concurrently; none of them depends on the others
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        docker_probe = executor.submit(check_command_exists, "docker")
+        env_file = executor.submit(setup_environment_file, overwrite_env)
+        models_dir = executor.submit(create_models_directory)
+    
+    if not env_file.result() or not models_dir.result():
+        sys.exit(1)
+    
     # Check for Docker
-    use_docker = check_docker()
+    use_docker = check_docker(docker_probe.result())
     
     if not use_docker:
         # Create virtual environment
         if not create_virtual_environment():
             sys.exit(1)
         
+        # Ask about optional extras up front so they install in the same pip run
+        install_dev = confirm("\nInstall development dependencies?")
+        install_hooks = confirm("Install pre-commit hooks?")
+        
         # Install dependencies
-        if not install_dependencies():
+        if not install_dependencies(dev=install_dev, pre_commit=install_hooks):
             sys.exit(1)
         
         # Setup pre-commit
-        setup_pre_commit()
-    
-    # Setup environment file
-    if not setup_environment_file():
-        sys.exit(1)
-    
-    # Create models directory
-    if not create_models_directory():
-        sys.exit(1)
+        if install_hooks:
+            setup_pre_commit()
+        else:
+            print_info("Skipping pre-commit setup")
     
     if not use_docker:
         # Train example models
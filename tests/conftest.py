@@ -0,0 +1,144 @@
+"""
+Shared fixtures for the ModelSwitch test suite.
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pytest
+import sklearn
+from fastapi.testclient import TestClient
+from sklearn.dummy import DummyClassifier
+
+from app.config import clear_versions_cache, settings
+from app.main import app
+
+try:
+    import uvloop  # Installed with uvicorn[standard]
+except ImportError:  # Optional dependency
+    uvloop = None
+
+# Parameters of the test data and models; any change invalidates the on-disk cache
+N_SAMPLES = 100
+N_FEATURES = 10
+RANDOM_STATE = 42
+
+
+def _cache_dir() -> Path:
+    """Directory where test data and fitted test models are kept between test runs."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(cache_home) / "modelswitch-tests"
+
+
+def _cached_model_path() -> Path:
+    """Path of the cached test model for the current sklearn version and parameters."""
+    key = f"dummy-{sklearn.__version__}-{N_SAMPLES}-{N_FEATURES}-{RANDOM_STATE}"
+    return _cache_dir() / f"{key}.pkl"
+
+
+def _fit_test_model(path: Path, X: np.ndarray, y: np.ndarray) -> None:
+    """Fit the test model and save it to `path`.
+
+    Tests only need a loadable estimator with a predict(), not a good one.
+    """
+    model = DummyClassifier(strategy="most_frequent")
+    model.fit(X, y)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    joblib.dump(model, tmp_path, compress=0, protocol=5)
+    os.replace(tmp_path, path)
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for every async test in the session (uvloop when available)."""
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def classification_data():
+    """(X, y) sample classification data, generated once and cached on disk."""
+    key = f"classification-{sklearn.__version__}-{N_SAMPLES}-{N_FEATURES}-{RANDOM_STATE}"
+    cache_path = _cache_dir() / f"{key}.npz"
+
+    try:
+        with np.load(cache_path) as data:
+            return data["X"], data["y"]
+    except (OSError, KeyError, ValueError):
+        pass  # Not cached yet, or a damaged file that gets replaced below
+
+    from sklearn.datasets import make_classification
+
+    X, y = make_classification(
+        n_samples=N_SAMPLES, n_features=N_FEATURES, random_state=RANDOM_STATE
+    )
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, X=X, y=y)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Read-only cache location; the data is still returned
+
+    return X, y
+
+
+@pytest.fixture(scope="session")
+def setup_test_models(request, tmp_path_factory):
+    """Create test models once per session and point the settings at them."""
+    models_dir = tmp_path_factory.mktemp("session") / "models"
+    models_dir.mkdir()
+
+    # Reuse the model fitted by a previous run when sklearn and parameters match
+    cached_model = _cached_model_path()
+    if not cached_model.exists():
+        # Only needed on a cache miss, so requested lazily
+        X, y = request.getfixturevalue("classification_data")
+        try:
+            _fit_test_model(cached_model, X, y)
+        except OSError:
+            # Read-only cache location: fit straight into the session directory
+            cached_model = models_dir / "model.pkl"
+            _fit_test_model(cached_model, X, y)
+
+    for version in ["v1", "v2"]:
+        version_dir = models_dir / version
+        version_dir.mkdir()
+        shutil.copyfile(cached_model, version_dir / "model.pkl")
+
+    # Point the settings at the test models directory for the whole session.
+    # Settings are read once at import, so the environment variable alone
+    # wouldn't take effect; it is set for anything that builds new Settings.
+    # Modules that did `from .config import settings` hold their own reference
+    # (app.main's startup would otherwise create ./models), so swap it everywhere.
+    test_settings = replace(settings, models_dir=str(models_dir))
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("MODELS_DIR", str(models_dir))
+        for name, module in list(sys.modules.items()):
+            is_app_module = name == "app" or name.startswith("app.")
+            if is_app_module and getattr(module, "settings", None) is settings:
+                mp.setattr(module, "settings", test_settings)
+        clear_versions_cache()
+        yield str(models_dir)
+    clear_versions_cache()
+
+
+@pytest.fixture(scope="session")
+def test_client(setup_test_models):
+    """Test client for the FastAPI app, with startup run once for the session.
+
+    Depends on setup_test_models so startup preloads the test models.
+    """
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,255 @@
+"""
+Tests for the Redis response cache.
+"""
+
+import fnmatch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from starlette.responses import JSONResponse, Response
+
+from app.cache import ResponseCache, cached, process_key, response_cache
+
+
+class FakeRedis:
+    """In-memory stand-in for the parts of redis.asyncio.Redis the cache uses."""
+
+    def __init__(self):
+        self.now = 0.0  # Fake clock for key expiry
+        self.store = {}  # key -> (value, expires at)
+
+    def _live(self, key):
+        value, expires_at = self.store.get(key, (None, None))
+        if expires_at is not None and self.now >= expires_at:
+            del self.store[key]
+            return None
+        return value
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = (value, self.now + ex if ex is not None else None)
+
+    async def scan_iter(self, match="*"):
+        for key in list(self.store):
+            if fnmatch.fnmatchcase(key, match) and self._live(key) is not None:
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+class DownRedis:
+    """Redis client whose server is unreachable."""
+
+    async def get(self, key):
+        raise RedisConnectionError("Connection refused")
+
+    async def set(self, key, value, ex=None):
+        raise RedisConnectionError("Connection refused")
+
+    async def scan_iter(self, match="*"):
+        raise RedisConnectionError("Connection refused")
+        yield  # pragma: no cover
+
+    async def delete(self, *keys):
+        raise RedisConnectionError("Connection refused")
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Back the global response cache with a FakeRedis for one test."""
+    redis = FakeRedis()
+    monkeypatch.setattr(response_cache, "_redis", redis)
+    return redis
+
+
+@pytest.mark.asyncio
+class TestResponseCache:
+    """Tests for the ResponseCache class."""
+
+    async def test_disabled_without_redis(self):
+        """Test a cache without a backend misses and ignores writes."""
+        response_cache = ResponseCache()
+
+        assert response_cache.enabled is False
+        await response_cache.set("key", b"body", expire=10)
+        assert await response_cache.get("key") is None
+        await response_cache.clear()
+
+    async def test_miss_then_hit(self):
+        """Test a stored body is returned under the prefixed key."""
+        redis = FakeRedis()
+        response_cache = ResponseCache(prefix="test")
+        response_cache._redis = redis
+
+        assert await response_cache.get("key") is None
+        await response_cache.set("key", b"body", expire=10)
+
+        assert await response_cache.get("key") == b"body"
+        assert list(redis.store) == ["test:key"]
+
+    async def test_expiry(self):
+        """Test bodies are dropped once `expire` seconds have passed."""
+        redis = FakeRedis()
+        response_cache = ResponseCache()
+        response_cache._redis = redis
+
+        await response_cache.set("key", b"body", expire=10)
+        redis.now = 9.9
+        assert await response_cache.get("key") == b"body"
+        redis.now = 10.0
+        assert await response_cache.get("key") is None
+
+    async def test_clear_only_drops_prefixed_keys(self):
+        """Test clear() leaves keys outside the cache's prefix alone."""
+        redis = FakeRedis()
+        response_cache = ResponseCache()
+        response_cache._redis = redis
+        await redis.set("other:key", b"keep")
+
+        await response_cache.set("a", b"1", expire=10)
+        await response_cache.set("b", b"2", expire=10)
+        await response_cache.clear()
+
+        assert list(redis.store) == ["other:key"]
+
+    async def test_redis_down(self):
+        """Test an unreachable server behaves like a cache miss."""
+        response_cache = ResponseCache()
+        response_cache._redis = DownRedis()
+
+        await response_cache.set("key", b"body", expire=10)
+        assert await response_cache.get("key") is None
+        await response_cache.clear()
+
+    async def test_connect_and_close(self):
+        """Test connect() enables the cache without connecting and close() disables it."""
+        response_cache = ResponseCache()
+
+        response_cache.connect("redis://localhost:6379/0")
+        assert response_cache.enabled is True
+
+        await response_cache.close()
+        assert response_cache.enabled is False
+
+
+@pytest.mark.asyncio
+class TestCachedDecorator:
+    """Tests for the cached endpoint decorator."""
+
+    async def test_miss_then_hit(self, fake_redis):
+        """Test the endpoint runs once and later calls are served from Redis."""
+        calls = []
+
+        @cached(expire=10)
+        async def endpoint():
+            calls.append(1)
+            return {"value": 1}
+
+        first = await endpoint()
+        second = await endpoint()
+
+        assert len(calls) == 1
+        assert first.body == second.body == b'{"value":1}'
+        assert second.media_type == "application/json"
+        assert fake_redis.store[f"modelswitch:{process_key()}:endpoint"][0] == b'{"value":1}'
+
+    async def test_key_is_process_and_endpoint_name(self, fake_redis):
+        """Test endpoints are cached under this process's id and their own names."""
+
+        @cached(expire=10)
+        async def first_endpoint():
+            return {"value": 1}
+
+        @cached(expire=10)
+        async def second_endpoint():
+            return {"value": 2}
+
+        await first_endpoint()
+        await second_endpoint()
+
+        assert (await second_endpoint()).body == b'{"value":2}'
+        assert sorted(fake_redis.store) == [
+            f"modelswitch:{process_key()}:first_endpoint",
+            f"modelswitch:{process_key()}:second_endpoint",
+        ]
+
+    async def test_other_process_entry_ignored(self, fake_redis):
+        """Test a body cached by another replica is never served here."""
+
+        @cached(expire=10)
+        async def endpoint():
+            return {"value": 1}
+
+        await fake_redis.set("modelswitch:other-host:1:endpoint", b'{"value":2}')
+
+        assert (await endpoint()).body == b'{"value":1}'
+
+    async def test_expired_body_reruns_endpoint(self, fake_redis):
+        """Test the endpoint runs again once its cached body expires."""
+        calls = []
+
+        @cached(expire=10)
+        async def endpoint():
+            calls.append(1)
+            return {"value": len(calls)}
+
+        await endpoint()
+        fake_redis.now = 10.0
+
+        assert (await endpoint()).body == b'{"value":2}'
+        assert len(calls) == 2
+
+    async def test_error_responses_not_cached(self, fake_redis):
+        """Test only 200 responses are stored."""
+
+        @cached(expire=10)
+        async def endpoint():
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+
+        response = await endpoint()
+
+        assert response.status_code == 503
+        assert fake_redis.store == {}
+
+    async def test_disabled_returns_endpoint_result(self, monkeypatch):
+        """Test the endpoint result is passed through untouched without Redis."""
+        monkeypatch.setattr(response_cache, "_redis", None)
+        result = {"value": 1}
+
+        @cached(expire=10)
+        async def endpoint():
+            return result
+
+        assert await endpoint() is result
+
+    async def test_redis_down_runs_endpoint(self, monkeypatch):
+        """Test requests still succeed while Redis is unreachable."""
+        monkeypatch.setattr(response_cache, "_redis", DownRedis())
+        calls = []
+
+        @cached(expire=10)
+        async def endpoint():
+            calls.append(1)
+            return {"value": 1}
+
+        for _ in range(2):
+            response = await endpoint()
+            assert isinstance(response, Response)
+            assert response.body == b'{"value":1}'
+        assert len(calls) == 2
+
+
+def test_health_check_not_cached():
+    """Test /healthz always reports this replica's live state."""
+    from app.main import admin_get_models_info, health_check
+
+    # functools.wraps in cached() sets __wrapped__ on decorated endpoints
+    assert hasattr(admin_get_models_info, "__wrapped__")
+    assert not hasattr(health_check, "__wrapped__")
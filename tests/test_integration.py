@@ -2,72 +2,77 @@
 Integration tests for the ModelSwitch API.
 """
 
+import asyncio
+import functools
+from dataclasses import replace
+
+import httpx
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-import joblib
-import os
-import tempfile
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.datasets import make_classification
 
+import app.main as main_module
+from app.cache import process_key, response_cache
 from app.main import app
-
-
-@pytest.fixture(scope="module")
-def test_client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
-
-
-@pytest.fixture(scope="module")
-def setup_test_models():
-    """Create test models for integration testing."""
-    # Create temporary models directory
-    models_dir = tempfile.mkdtemp()
-    
-    # Generate test data
-    X, y = make_classification(n_samples=100, n_features=10, random_state=42)
-    
-    # Train and save test models
-    for version in ["v1", "v2"]:
-        version_dir = os.path.join(models_dir, version)
-        os.makedirs(version_dir, exist_ok=True)
-        
-        model = RandomForestClassifier(n_estimators=10, random_state=42)
-        model.fit(X, y)
-        
-        model_path = os.path.join(version_dir, "model.pkl")
-        joblib.dump(model, model_path)
-    
-    # Temporarily set the models directory
-    original_dir = os.environ.get("MODELS_DIR")
-    os.environ["MODELS_DIR"] = models_dir
-    
-    yield models_dir
-    
-    # Cleanup
-    if original_dir:
-        os.environ["MODELS_DIR"] = original_dir
-    else:
-        os.environ.pop("MODELS_DIR", None)
-    
-    # Remove test models
-    import shutil
-    shutil.rmtree(models_dir, ignore_errors=True)
-
-
-class TestRootEndpoint:
-    """Tests for the root endpoint."""
-    
-    def test_root_endpoint(self, test_client):
-        """Test root endpoint returns correct information."""
-        response = test_client.get("/")
+from tests.test_cache import FakeRedis
+
+# Prediction payloads are encoded once and posted as raw bodies
+FEATURES = [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+@functools.lru_cache(maxsize=None)
+def predict_body(version=None):
+    """Encoded /predict request body, optionally pinned to a model version."""
+    payload = {"features": FEATURES}
+    if version is not None:
+        payload["version"] = version
+    return orjson.dumps(payload)
+
+
+PREDICT_BODY = predict_body()
+
+# Cheap request/status checks, run as one parametrized test against the shared client
+CORS_PREFLIGHT = {
+    "Origin": "http://example.com",
+    "Access-Control-Request-Method": "POST"
+}
+
+SMOKE_CASES = [
+    ("GET", "/", {}, (200,)),  # Root endpoint
+    ("GET", "/metrics", {}, (200,)),  # Prometheus metrics
+    ("OPTIONS", "/predict", CORS_PREFLIGHT, (200, 204)),  # CORS should allow the request
+    ("GET", "/nonexistent", {}, (404,)),  # Non-existent endpoint
+    ("GET", "/predict", {}, (405,)),  # Wrong HTTP method
+]
+
+
+class TestSmoke:
+    """Smoke tests for root, metrics, CORS and error handling."""
+    
+    @pytest.mark.parametrize("method,path,headers,expected", SMOKE_CASES)
+    def test_endpoint_status(self, test_client, method, path, headers, expected):
+        """Test endpoints respond with the expected status and body."""
+        response = test_client.request(method, path, headers=headers)
+        
+        assert response.status_code in expected
+        
+        if path == "/":
+            data = response.json()
+            assert data["name"] == "ModelSwitch"
+            assert "docs" in data
+            assert "health" in data
+        elif path == "/metrics":
+            # Prometheus exposition is plain text, so check the body as text
+            assert "model_inference_latency_seconds" in response.text
+    
+    def test_metrics_disabled(self, test_client, monkeypatch):
+        """Test the metrics endpoint is hidden when metrics are disabled."""
+        settings = replace(main_module.settings, metrics_enabled=False)
+        monkeypatch.setattr(main_module, "settings", settings)
+        response = test_client.get("/metrics")
         
-        assert response.status_code == 200
-        data = response.json()
-        assert data["name"] == "ModelSwitch"
-        assert "docs" in data
-        assert "health" in data
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Metrics disabled"
 
 
 class TestHealthEndpoint:
@@ -89,11 +94,7 @@ class TestPredictionEndpoint:
     
     def test_prediction_success(self, test_client, setup_test_models):
         """Test successful prediction."""
-        payload = {
-            "features": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
-        }
-        
-        response = test_client.post("/predict", json=payload)
+        response = test_client.post("/predict", content=PREDICT_BODY, headers=JSON_HEADERS)
         
         assert response.status_code == 200
         data = response.json()
@@ -104,12 +105,7 @@ class TestPredictionEndpoint:
     
     def test_prediction_with_version(self, test_client, setup_test_models):
         """Test prediction with specific version."""
-        payload = {
-            "features": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0],
-            "version": "v2"
-        }
-        
-        response = test_client.post("/predict", json=payload)
+        response = test_client.post("/predict", content=predict_body("v2"), headers=JSON_HEADERS)
         
         assert response.status_code == 200
         data = response.json()
@@ -157,6 +153,31 @@ class TestAdminEndpoints:
         assert data["success"] is True
         assert data["active_version"] == "v2"
     
+    def test_active_version_cached_per_replica(self, test_client, monkeypatch):
+        """Test a switch shows up at once with the response cache enabled."""
+        redis = FakeRedis()
+        monkeypatch.setattr(response_cache, "_redis", redis)
+        original = test_client.get("/admin/active-version").json()["active_version"]
+        
+        # Key another replica caches its own (unswitched) state under
+        with monkeypatch.context() as mp:
+            mp.setattr("app.cache.os.getpid", lambda: -1)
+            other_key = f"modelswitch:{process_key()}:admin_get_active_version"
+        stale = orjson.dumps({"active_version": "v999", "available_versions": ["v999"]})
+        
+        try:
+            for version in ("v2", "v1", "v2"):
+                test_client.post("/admin/set-active-version", json={"version": version})
+                # The other replica re-caches its state right after the switch clears Redis
+                redis.store[other_key] = (stale, None)
+                
+                for _ in range(2):  # Miss, then served from this replica's cached body
+                    response = test_client.get("/admin/active-version")
+                    assert response.status_code == 200
+                    assert response.json()["active_version"] == version
+        finally:
+            test_client.post("/admin/set-active-version", json={"version": original})
+    
     def test_set_invalid_version(self, test_client, setup_test_models):
         """Test setting invalid version."""
         payload = {"version": "v999"}
@@ -197,85 +218,37 @@ class TestAdminEndpoints:
         assert data["success"] is True
 
 
-class TestMetricsEndpoint:
-    """Tests for metrics endpoint."""
-    
-    def test_metrics_endpoint(self, test_client):
-        """Test Prometheus metrics endpoint."""
-        response = test_client.get("/metrics")
-        
-        assert response.status_code == 200
-        content = response.text
-        
-        # Check for expected metrics
-        assert "model_inference_latency_seconds" in content or "Metrics disabled" in response.json().get("detail", "")
-
-
-class TestCORS:
-    """Tests for CORS configuration."""
-    
-    def test_cors_headers(self, test_client):
-        """Test CORS headers are present."""
-        response = test_client.options(
-            "/predict",
-            headers={
-                "Origin": "http://example.com",
-                "Access-Control-Request-Method": "POST"
-            }
-        )
-        
-        # CORS should allow the request
-        assert response.status_code in [200, 204]
-
-
-class TestErrorHandling:
-    """Tests for error handling."""
-    
-    def test_404_error(self, test_client):
-        """Test 404 error for non-existent endpoint."""
-        response = test_client.get("/nonexistent")
-        
-        assert response.status_code == 404
-    
-    def test_method_not_allowed(self, test_client):
-        """Test 405 error for wrong HTTP method."""
-        response = test_client.get("/predict")
-        
-        assert response.status_code == 405
-
-
 class TestEndToEnd:
     """End-to-end workflow tests."""
     
-    def test_complete_workflow(self, test_client, setup_test_models):
+    @pytest.mark.asyncio
+    async def test_complete_workflow(self, test_client, setup_test_models):
         """Test complete workflow: health check, predict, switch version, predict again."""
-        # 1. Health check
-        health_response = test_client.get("/healthz")
-        assert health_response.status_code == 200
-        
-        # 2. Make prediction with v1 (default)
-        predict_payload = {
-            "features": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
-        }
-        prediction1 = test_client.post("/predict", json=predict_payload)
-        assert prediction1.status_code == 200
-        v1_result = prediction1.json()["prediction"]
-        
-        # 3. Switch to v2
-        switch_response = test_client.post(
-            "/admin/set-active-version",
-            json={"version": "v2"}
-        )
-        assert switch_response.status_code == 200
-        assert switch_response.json()["active_version"] == "v2"
-        
-        # 4. Make prediction with v2
-        prediction2 = test_client.post("/predict", json=predict_payload)
-        assert prediction2.status_code == 200
-        assert prediction2.json()["model_version"] == "v2"
-        
-        # 5. Verify we can still explicitly use v1
-        predict_payload["version"] = "v1"
-        prediction3 = test_client.post("/predict", json=predict_payload)
-        assert prediction3.status_code == 200
-        assert prediction3.json()["model_version"] == "v1"
+        # test_client has already run app startup; requests go straight to the ASGI app
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            # 1-2. Health check and prediction with the active version are independent
+            health_response, prediction1 = await asyncio.gather(
+                client.get("/healthz"),
+                client.post("/predict", content=PREDICT_BODY, headers=JSON_HEADERS)
+            )
+            assert health_response.status_code == 200
+            assert prediction1.status_code == 200
+            assert "prediction" in prediction1.json()
+            
+            # 3. Switch to v2
+            switch_response = await client.post(
+                "/admin/set-active-version",
+                json={"version": "v2"}
+            )
+            assert switch_response.status_code == 200
+            assert switch_response.json()["active_version"] == "v2"
+            
+            # 4-5. Predict with v2 (now active) and explicitly with v1, concurrently
+            prediction2, prediction3 = await asyncio.gather(
+                client.post("/predict", content=PREDICT_BODY, headers=JSON_HEADERS),
+                client.post("/predict", content=predict_body("v1"), headers=JSON_HEADERS)
+            )
+            assert prediction2.status_code == 200
+            assert prediction2.json()["model_version"] == "v2"
+            assert prediction3.status_code == 200
+            assert prediction3.json()["model_version"] == "v1"
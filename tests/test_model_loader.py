@@ -1,19 +1,39 @@
 import pytest
 import os
-import tempfile
+import threading
+import time
 import joblib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 
-from app.model_loader import ModelRegistry
-from app.config import get_model_path, get_available_versions
+from app.model_loader import ModelRegistry, OnnxModel
+from app.config import get_model_path, get_available_versions, clear_versions_cache
+
+
+@pytest.fixture(autouse=True)
+def fast_joblib(request, monkeypatch):
+    """Keep dummy models off the serializer; dumps leave an empty model file.
+    
+    Tests marked real_joblib keep the real joblib.dump/load.
+    """
+    if request.node.get_closest_marker("real_joblib"):
+        return
+    
+    def dump(value, filename, **kwargs):
+        open(filename, "wb").close()
+    
+    monkeypatch.setattr("app.model_loader.joblib.load", lambda filename, **kwargs: {"test": "data"})
+    monkeypatch.setattr("app.model_loader.joblib.dump", dump)
 
 
 class TestModelRegistry:
     """Test cases for ModelRegistry class."""
     
-    def setup_method(self):
-        """Set up test environment."""
-        self.temp_dir = tempfile.mkdtemp()
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        """Set up test environment (pytest removes tmp_path itself)."""
+        self.temp_dir = str(tmp_path)
         self.registry = ModelRegistry()
         self.registry._models = {}  # Clear cache
         self.registry._load_times = {}
@@ -22,11 +42,6 @@ class TestModelRegistry:
         os.makedirs(os.path.join(self.temp_dir, "v1"), exist_ok=True)
         os.makedirs(os.path.join(self.temp_dir, "v2"), exist_ok=True)
     
-    def teardown_method(self):
-        """Clean up test environment."""
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
     def test_get_model_path(self):
         """Test model path generation."""
         path = get_model_path("v1")
@@ -56,14 +71,41 @@ class TestModelRegistry:
             assert "v2" in versions
             assert len(versions) == 2
     
+    def test_get_available_versions_cached(self):
+        """Test directory scans are reused until the cache is cleared."""
+        joblib.dump({"test": "model1"}, os.path.join(self.temp_dir, "v1", "model.pkl"))
+        
+        with patch('app.config.settings') as mock_settings:
+            mock_settings.models_dir = self.temp_dir
+            assert get_available_versions() == ["v1"]
+            
+            joblib.dump({"test": "model2"}, os.path.join(self.temp_dir, "v2", "model.pkl"))
+            assert get_available_versions() == ["v1"]
+            
+            clear_versions_cache()
+            assert get_available_versions() == ["v1", "v2"]
+    
+    def test_get_available_versions_sees_new_version_dir(self):
+        """Test a new version directory invalidates the cached scan immediately."""
+        joblib.dump({"test": "model1"}, os.path.join(self.temp_dir, "v1", "model.pkl"))
+        
+        with patch('app.config.settings') as mock_settings:
+            mock_settings.models_dir = self.temp_dir
+            assert get_available_versions() == ["v1"]
+            
+            os.makedirs(os.path.join(self.temp_dir, "v3"))
+            joblib.dump({"test": "model3"}, os.path.join(self.temp_dir, "v3", "model.pkl"))
+            assert get_available_versions() == ["v1", "v3"]
+    
+    @pytest.mark.real_joblib
     def test_load_model_success(self):
-        """Test successful model loading."""
+        """Test successful model loading round-trips a real joblib file."""
         # Create test model
         model_path = os.path.join(self.temp_dir, "v1", "model.pkl")
-        test_model = {"test": "data"}
+        test_model = {"test": "round-trip", "values": [1, 2, 3]}
         joblib.dump(test_model, model_path)
         
-        with patch('app.config.get_model_path') as mock_path:
+        with patch('app.model_loader.get_model_path') as mock_path:
             mock_path.return_value = model_path
             
             model = self.registry.get_model("v1")
@@ -71,9 +113,85 @@ class TestModelRegistry:
             assert "v1" in self.registry._models
             assert "v1" in self.registry._load_times
     
+    @pytest.mark.real_joblib
+    @pytest.mark.parametrize("task", ["classification", "regression"])
+    def test_load_model_prefers_onnx(self, task):
+        """Test an ONNX export next to the pickle is served and matches sklearn."""
+        pytest.importorskip("onnxruntime")
+        skl2onnx = pytest.importorskip("skl2onnx")
+        from skl2onnx.common.data_types import FloatTensorType
+        from sklearn.datasets import make_classification, make_regression
+        from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+        
+        if task == "classification":
+            X, y = make_classification(n_samples=50, n_features=4, random_state=42)
+            sklearn_model = DecisionTreeClassifier(max_depth=3, random_state=42).fit(X, y)
+        else:
+            X, y = make_regression(n_samples=50, n_features=4, random_state=42)
+            sklearn_model = DecisionTreeRegressor(max_depth=3, random_state=42).fit(X, y)
+        
+        model_path = os.path.join(self.temp_dir, "v1", "model.pkl")
+        onnx_path = os.path.join(self.temp_dir, "v1", "model.onnx")
+        joblib.dump(sklearn_model, model_path)
+        onnx_model = skl2onnx.convert_sklearn(
+            sklearn_model, initial_types=[("float_input", FloatTensorType([None, 4]))]
+        )
+        with open(onnx_path, "wb") as f:
+            f.write(onnx_model.SerializeToString())
+        
+        with patch('app.model_loader.get_model_path', return_value=model_path), \
+                patch('app.model_loader.get_onnx_model_path', return_value=onnx_path):
+            model = self.registry.get_model("v1")
+        
+        assert isinstance(model, OnnxModel)
+        features = X.astype(np.float32)
+        predictions = model.predict(features)
+        assert predictions.shape == (len(X),)
+        np.testing.assert_allclose(predictions, sklearn_model.predict(features), rtol=1e-5)
+    
+    def test_concurrent_get_model_loads_once(self):
+        """Test concurrent first requests for a version share a single load."""
+        model_path = os.path.join(self.temp_dir, "v1", "model.pkl")
+        joblib.dump({"test": "data"}, model_path)
+        
+        def slow_load(path, **kwargs):
+            time.sleep(0.05)
+            return {"test": "data"}
+        
+        with patch('app.model_loader.get_model_path', return_value=model_path), \
+                patch('app.model_loader.joblib.load', side_effect=slow_load) as mock_load:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                models = list(executor.map(lambda _: self.registry.get_model("v1"), range(4)))
+        
+        assert mock_load.call_count == 1
+        assert all(model is models[0] for model in models)
+    
+    def test_warm_all_loads_versions_in_parallel(self):
+        """Test warm_all loads every version concurrently."""
+        for version in ["v1", "v2"]:
+            joblib.dump({"test": version}, os.path.join(self.temp_dir, version, "model.pkl"))
+        
+        # Each load waits at the barrier until the other one arrives, so the
+        # loads only succeed if they run at the same time
+        both_loading = threading.Barrier(2, timeout=5)
+        
+        def overlapping_load(path, **kwargs):
+            both_loading.wait()
+            return {"test": "data"}
+        
+        with patch('app.config.settings') as mock_settings, \
+                patch('app.model_loader.joblib.load', side_effect=overlapping_load):
+            mock_settings.models_dir = self.temp_dir
+            loaded = self.registry.warm_all()
+        
+        assert loaded == ["v1", "v2"]
+        assert "v1" in self.registry._models
+        assert "v2" in self.registry._models
+        assert not both_loading.broken
+    
     def test_load_model_not_found(self):
         """Test model loading when file doesn't exist."""
-        with patch('app.config.get_model_path') as mock_path:
+        with patch('app.model_loader.get_model_path') as mock_path:
             mock_path.return_value = "nonexistent/path/model.pkl"
             
             with pytest.raises(FileNotFoundError):
@@ -85,7 +203,7 @@ class TestModelRegistry:
         model_path = os.path.join(self.temp_dir, "v1", "model.pkl")
         joblib.dump({"test": "data"}, model_path)
         
-        with patch('app.config.get_model_path') as mock_path:
+        with patch('app.model_loader.get_model_path') as mock_path:
             mock_path.return_value = model_path
             
             success = self.registry.set_active_version("v1")
@@ -94,7 +212,7 @@ class TestModelRegistry:
     
     def test_set_active_version_not_found(self):
         """Test version switching when model doesn't exist."""
-        with patch('app.config.get_model_path') as mock_path:
+        with patch('app.model_loader.get_model_path') as mock_path:
             mock_path.return_value = "nonexistent/path/model.pkl"
             
             success = self.registry.set_active_version("v1")
@@ -107,7 +225,7 @@ class TestModelRegistry:
         test_model = {"test": "data"}
         joblib.dump(test_model, model_path)
         
-        with patch('app.config.get_model_path') as mock_path:
+        with patch('app.model_loader.get_model_path') as mock_path:
             mock_path.return_value = model_path
             
             # Load the model first
@@ -119,18 +237,34 @@ class TestModelRegistry:
             assert info["version"] == "v1"
             assert info["exists"] is True
             assert info["loaded"] is True
-            assert info["active"] is False  # Not set as active
+            assert info["active"] is True  # v1 is the default active version
             assert info["load_time"] is not None
             assert info["file_size"] is not None
             assert info["modified_time"] is not None
     
+    def test_get_model_info_reuses_stat(self):
+        """Test file stats are cached until the registry cache is cleared."""
+        model_path = os.path.join(self.temp_dir, "v1", "model.pkl")
+        joblib.dump({"test": "data"}, model_path)
+        
+        with patch('app.model_loader.get_model_path') as mock_path:
+            mock_path.return_value = model_path
+            
+            size = self.registry.get_model_info("v1")["file_size"]
+            with open(model_path, "wb") as f:
+                f.write(b"more data")
+            assert self.registry.get_model_info("v1")["file_size"] == size
+            
+            self.registry.clear_cache("v1")
+            assert self.registry.get_model_info("v1")["file_size"] > size
+    
     def test_clear_cache(self):
         """Test cache clearing functionality."""
         # Create and load a model
         model_path = os.path.join(self.temp_dir, "v1", "model.pkl")
         joblib.dump({"test": "data"}, model_path)
         
-        with patch('app.config.get_model_path') as mock_path:
+        with patch('app.model_loader.get_model_path') as mock_path:
             mock_path.return_value = model_path
             
             self.registry.get_model("v1")
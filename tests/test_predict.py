@@ -2,33 +2,82 @@
 Comprehensive tests for the predict module.
 """
 
+import asyncio
+import math
+import re
+import threading
 import pytest
 import numpy as np
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import patch, MagicMock
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
 
+from app.model_loader import ModelRegistry
 from app.predict import (
+    BatchingPredictor,
     PredictionRequest,
     PredictionResponse,
     make_prediction,
     validate_features,
-    predict_with_validation
+    predict_with_validation,
 )
 
 
+# Expected error messages, compiled once
+_MODEL_NOT_FOUND_RE = re.compile(r"Model version .* not found")
+_PRED_FAIL_RE = re.compile(r"Prediction failed")
+_INVALID_FEATS_RE = re.compile(r"Invalid features")
+
+# Canned model outputs, built once and shared by the mocks below
+_PRED_1 = np.array([1], dtype=np.int64)
+_PRED_2 = np.array([2], dtype=np.int64)
+_PROBA = np.array([[0.1, 0.9]], dtype=np.float64)
+for _output in (_PRED_1, _PRED_2, _PROBA):
+    _output.setflags(write=False)  # Shared between tests, so never mutated
+
+
+@pytest.fixture(scope="module")
+def mock_registry():
+    """Registry mock patched into app.predict once for the whole module."""
+    registry = MagicMock(spec=ModelRegistry)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("app.predict.model_registry", registry)
+        yield registry
+
+
+@pytest.fixture(autouse=True)
+def reset_mock_registry(mock_registry):
+    """Give every test a clean registry mock without rebuilding it."""
+    yield
+    mock_registry.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture
+def req_3f():
+    """Three-feature request; model_construct skips validating trusted test input."""
+    return PredictionRequest.model_construct(features=[1.0, 2.0, 3.0], version=None)
+
+
+@pytest.fixture
+def req_2f():
+    """Two-feature request; model_construct skips validating trusted test input."""
+    return PredictionRequest.model_construct(features=[1.0, 2.0], version=None)
+
+
 class TestPredictionRequest:
     """Tests for PredictionRequest schema."""
-    
+
     def test_valid_request(self):
         """Test creating a valid prediction request."""
         request = PredictionRequest(features=[1.0, 2.0, 3.0])
         assert request.features == [1.0, 2.0, 3.0]
         assert request.version is None
-    
+
     def test_request_with_version(self):
         """Test request with specific version."""
         request = PredictionRequest(features=[1.0, 2.0], version="v2")
         assert request.version == "v2"
-    
+
     def test_mixed_numeric_types(self):
         """Test request with mixed int and float features."""
         request = PredictionRequest(features=[1, 2.5, 3])
@@ -37,176 +86,266 @@ class TestPredictionRequest:
 
 class TestFeatureValidation:
     """Tests for feature validation."""
-    
-    def test_validate_valid_features(self):
-        """Test validation of valid features."""
-        assert validate_features([1.0, 2.0, 3.0]) is True
-        assert validate_features([1, 2, 3]) is True
-        assert validate_features([0.0]) is True
-    
-    def test_validate_empty_features(self):
-        """Test validation of empty features."""
-        assert validate_features([]) is False
-    
-    def test_validate_nan_features(self):
-        """Test validation rejects NaN values."""
-        assert validate_features([1.0, float('nan'), 3.0]) is False
-    
-    def test_validate_inf_features(self):
-        """Test validation rejects infinity values."""
-        assert validate_features([1.0, float('inf'), 3.0]) is False
-        assert validate_features([1.0, float('-inf'), 3.0]) is False
-    
-    def test_validate_invalid_types(self):
-        """Test validation rejects non-numeric values."""
-        assert validate_features([1.0, "invalid", 3.0]) is False
-        assert validate_features([1.0, None, 3.0]) is False
+
+    @pytest.mark.parametrize(
+        "features,expected",
+        [
+            ([1.0, 2.0, 3.0], True),
+            ([1, 2, 3], True),
+            ([0.0], True),
+            ([], False),  # Empty
+            ([1.0, math.nan, 3.0], False),  # NaN
+            ([1.0, math.inf, 3.0], False),  # Infinity
+            ([1.0, -math.inf, 3.0], False),
+            ([1.0, "invalid", 3.0], False),  # Non-numeric
+            ([1.0, None, 3.0], False),
+        ],
+    )
+    def test_validate_features(self, features, expected):
+        """Test validation accepts finite numeric features and rejects the rest."""
+        assert validate_features(features) is expected
+
+    @pytest.mark.parametrize(
+        "features",
+        [
+            [1.0] * 8,  # Largest vector on the pure-Python path
+            [1.0] * 9,  # Smallest vector on the NumPy path
+            [1.0] * 7 + [math.nan],
+            [1.0] * 8 + [math.nan],
+            [1, 2.5, -3],
+            [True, 1.0],  # Bools fall through to NumPy
+            [2**62],
+            [2**63],  # uint64 in NumPy
+            [-1, 2**63],  # float64 in NumPy
+            [2**70],  # Too large for any NumPy numeric dtype
+            [2**70] * 9,
+            [10**400],
+            [-(2**63) - 1],
+        ],
+    )
+    def test_validate_small_path_matches_numpy(self, features, monkeypatch):
+        """Test the pure-Python path gives the same answer as the NumPy path."""
+        small_path = validate_features(features)
+        monkeypatch.setattr("app.predict.SMALL_FEATURES_MAX", 0)
+        assert small_path is validate_features(features)
+
+    @pytest.mark.parametrize("features", [[2**70], [2**70] * 9, [10**400]])
+    def test_validate_huge_ints(self, features):
+        """Test ints that can't be cast to float32 features are rejected."""
+        assert validate_features(features) is False
+
+    @pytest.mark.parametrize("size", [3, 9])  # Pure-Python and NumPy paths
+    def test_validate_float32_range(self, size):
+        """Test finite values beyond float32's range are only rejected for float32."""
+        assert validate_features([1e39] * size) is True
+        assert validate_features([1e39] * size, float32=True) is False
+        assert validate_features([-1e39] + [1.0] * (size - 1), float32=True) is False
+        assert validate_features([3e38] * size, float32=True) is True
+        assert validate_features([math.inf] * size, float32=True) is False
+        assert validate_features([math.nan] * size, float32=True) is False
+
+    def test_validate_large_features(self):
+        """Test validation of a large feature vector in one vectorized pass."""
+        features = [float(i) for i in range(100_000)]
+        assert validate_features(features) is True
+
+        features[-1] = math.nan
+        assert validate_features(features) is False
 
 
 @pytest.mark.asyncio
 class TestMakePrediction:
     """Tests for the make_prediction function."""
-    
-    @patch('app.predict.model_registry')
-    async def test_successful_prediction(self, mock_registry):
-        """Test successful prediction."""
+
+    @patch("app.predict.record_inference_latency")
+    @patch("app.predict.record_prediction_request")
+    async def test_successful_prediction(self, mock_request, mock_latency, mock_registry, req_3f):
+        """Test successful prediction records success metrics."""
         # Setup mock model
-        mock_model = Mock()
-        mock_model.predict.return_value = np.array([1])
-        mock_registry.get_model.return_value = mock_model
+        mock_model = MagicMock(spec=["predict"])
+        mock_model.predict.return_value = _PRED_1
+        mock_registry.aget_model.return_value = mock_model
         mock_registry.get_active_version.return_value = "v1"
-        
+
         # Make prediction
-        request = PredictionRequest(features=[1.0, 2.0, 3.0])
-        response = await make_prediction(request)
-        
+        response = await make_prediction(req_3f)
+
         # Assertions
         assert response.prediction == 1
         assert response.model_version == "v1"
         assert response.latency_ms > 0
         mock_model.predict.assert_called_once()
-    
-    @patch('app.predict.model_registry')
+
+        # Verify metrics were recorded
+        mock_latency.assert_called_once()
+        mock_request.assert_called_once_with("v1", "success")
+
     async def test_prediction_with_specific_version(self, mock_registry):
         """Test prediction with specific version override."""
-        mock_model = Mock()
-        mock_model.predict.return_value = np.array([2])
-        mock_registry.get_model.return_value = mock_model
-        
+        mock_model = MagicMock(spec=["predict"])
+        mock_model.predict.return_value = _PRED_2
+        mock_registry.aget_model.return_value = mock_model
+
         request = PredictionRequest(features=[1.0, 2.0], version="v2")
         response = await make_prediction(request)
-        
+
         assert response.model_version == "v2"
-        mock_registry.get_model.assert_called_with("v2")
-    
-    @patch('app.predict.model_registry')
-    async def test_prediction_model_not_found(self, mock_registry):
+        mock_registry.aget_model.assert_called_with("v2")
+
+    async def test_prediction_model_not_found(self, mock_registry, req_2f):
         """Test prediction when model is not found."""
-        mock_registry.get_model.side_effect = FileNotFoundError()
+        mock_registry.aget_model.side_effect = FileNotFoundError()
         mock_registry.get_active_version.return_value = "v1"
-        
-        request = PredictionRequest(features=[1.0, 2.0])
-        
-        with pytest.raises(ValueError, match="Model version .* not found"):
-            await make_prediction(request)
-    
-    @patch('app.predict.model_registry')
-    async def test_prediction_runtime_error(self, mock_registry):
+
+        with pytest.raises(ValueError, match=_MODEL_NOT_FOUND_RE):
+            await make_prediction(req_2f)
+
+    async def test_prediction_runtime_error(self, mock_registry, req_2f):
         """Test prediction when runtime error occurs."""
-        mock_model = Mock()
+        mock_model = MagicMock(spec=["predict"])
         mock_model.predict.side_effect = RuntimeError("Model error")
-        mock_registry.get_model.return_value = mock_model
+        mock_registry.aget_model.return_value = mock_model
         mock_registry.get_active_version.return_value = "v1"
-        
-        request = PredictionRequest(features=[1.0, 2.0])
-        
-        with pytest.raises(RuntimeError, match="Prediction failed"):
-            await make_prediction(request)
-    
-    @patch('app.predict.model_registry')
-    async def test_prediction_with_array_output(self, mock_registry):
+
+        with pytest.raises(RuntimeError, match=_PRED_FAIL_RE):
+            await make_prediction(req_2f)
+
+    async def test_prediction_with_array_output(self, mock_registry, req_2f):
         """Test prediction that returns array."""
-        mock_model = Mock()
-        mock_model.predict.return_value = np.array([[0.1, 0.9]])
-        mock_registry.get_model.return_value = mock_model
+        mock_model = MagicMock(spec=["predict"])
+        mock_model.predict.return_value = _PROBA
+        mock_registry.aget_model.return_value = mock_model
         mock_registry.get_active_version.return_value = "v1"
-        
-        request = PredictionRequest(features=[1.0, 2.0])
-        response = await make_prediction(request)
-        
+
+        response = await make_prediction(req_2f)
+
         # Should unwrap single-row array
         assert response.prediction == [0.1, 0.9]
 
+    async def test_concurrent_predictions_are_batched(self, mock_registry):
+        """Test concurrent requests share a single predict call."""
+        mock_model = MagicMock(spec=["predict"])
+        mock_model.predict.side_effect = lambda X: np.arange(len(X))
+        mock_registry.aget_model.return_value = mock_model
+        mock_registry.get_active_version.return_value = "v1"
+
+        requests = [PredictionRequest(features=[float(i), 1.0]) for i in range(3)]
+        responses = await asyncio.gather(*(make_prediction(r) for r in requests))
+
+        assert [r.prediction for r in responses] == [0, 1, 2]
+        mock_model.predict.assert_called_once()
+
+    async def test_batch_failure_isolated_per_request(self, mock_registry):
+        """Test one invalid request doesn't fail the rest of its batch."""
+
+        def predict(X):
+            if X.shape[1] != 2:
+                raise ValueError("Wrong number of features")
+            return np.ones(len(X))
+
+        mock_model = MagicMock(spec=["predict"])
+        mock_model.predict.side_effect = predict
+        mock_registry.aget_model.return_value = mock_model
+        mock_registry.get_active_version.return_value = "v1"
+
+        good = make_prediction(PredictionRequest(features=[1.0, 2.0]))
+        bad = make_prediction(PredictionRequest(features=[1.0, 2.0, 3.0]))
+        results = await asyncio.gather(good, bad, return_exceptions=True)
+
+        assert results[0].prediction == 1.0
+        assert isinstance(results[1], RuntimeError)
+
+    async def test_float32_overflow_rejected(self, mock_registry):
+        """Test features a tree model would see as inf fail validation, not predict."""
+        X = np.arange(30.0).reshape(10, 3)
+        model = RandomForestRegressor(n_estimators=2, random_state=0).fit(X, X.sum(axis=1))
+        mock_registry.aget_model.return_value = model
+        mock_registry.get_active_version.return_value = "v1"
+
+        request = PredictionRequest(features=[1e39, 1.0, 1.0])
+        with pytest.raises(ValueError, match=_INVALID_FEATS_RE):
+            await make_prediction(request)
+
+    async def test_float64_models_keep_precision(self, mock_registry):
+        """Test models that don't take float32 get float64 features."""
+        X = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+        model = LinearRegression().fit(X, X.sum(axis=1))
+        mock_registry.aget_model.return_value = model
+        mock_registry.get_active_version.return_value = "v1"
+
+        features = [123456789.123, 1.0, 1.0]
+        response = await make_prediction(PredictionRequest(features=features))
+
+        assert response.prediction == model.predict(np.array([features]))[0]
+
+
+class TestBatchingPredictor:
+    """Tests for the BatchingPredictor class."""
+
+    def test_batches_from_two_event_loops(self):
+        """Test batches pending on different event loops don't replace each other."""
+        predictor = BatchingPredictor(max_batch_size=8, max_wait=0.2)
+        mock_model = MagicMock(spec=["predict"])
+        mock_model.predict.side_effect = lambda X: np.arange(len(X))
+        both_queued = threading.Barrier(2, timeout=5)
+        results = {}
+
+        async def predict(name):
+            # Queue on this thread's loop while the other loop's batch is pending
+            task = asyncio.ensure_future(predictor.predict("v1", mock_model, [1.0, 2.0]))
+            await asyncio.sleep(0)
+            both_queued.wait()
+            results[name] = await asyncio.wait_for(task, timeout=5)
+
+        threads = [
+            threading.Thread(target=asyncio.run, args=(predict(name),)) for name in ("a", "b")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {"a": 0, "b": 0}
+        assert mock_model.predict.call_count == 2
+
 
 @pytest.mark.asyncio
 class TestPredictWithValidation:
     """Tests for predict_with_validation function."""
-    
-    @patch('app.predict.make_prediction')
-    async def test_valid_prediction(self, mock_predict):
+
+    @patch("app.predict.make_prediction")
+    async def test_valid_prediction(self, mock_predict, req_3f):
         """Test prediction with valid features."""
-        mock_response = PredictionResponse(
-            prediction=1,
-            model_version="v1",
-            latency_ms=10.0
-        )
+        mock_response = PredictionResponse(prediction=1, model_version="v1", latency_ms=10.0)
         mock_predict.return_value = mock_response
-        
-        request = PredictionRequest(features=[1.0, 2.0, 3.0])
-        response = await predict_with_validation(request)
-        
+
+        response = await predict_with_validation(req_3f)
+
         assert response == mock_response
-        mock_predict.assert_called_once_with(request)
-    
-    async def test_invalid_features(self):
-        """Test prediction with invalid features."""
-        request = PredictionRequest(features=[])
-        
-        with pytest.raises(ValueError, match="Invalid features"):
-            await predict_with_validation(request)
-    
-    async def test_nan_features(self):
-        """Test prediction with NaN features."""
-        request = PredictionRequest(features=[1.0, float('nan')])
-        
-        with pytest.raises(ValueError, match="Invalid features"):
+        assert mock_predict.call_count == 1
+        assert mock_predict.call_args.args[0] is req_3f
+
+    @pytest.mark.parametrize("features", [[], [1.0, math.nan], [1.0, math.inf]])
+    async def test_invalid_features(self, features):
+        """Test prediction with empty, NaN or infinite features."""
+        request = PredictionRequest.model_construct(features=features, version=None)
+
+        with pytest.raises(ValueError, match=_INVALID_FEATS_RE):
             await predict_with_validation(request)
 
 
 @pytest.mark.asyncio
 class TestMetricsRecording:
     """Tests for metrics recording during predictions."""
-    
-    @patch('app.predict.record_inference_latency')
-    @patch('app.predict.record_prediction_request')
-    @patch('app.predict.model_registry')
-    async def test_metrics_recorded_on_success(
-        self, mock_registry, mock_request, mock_latency
-    ):
-        """Test that metrics are recorded on successful prediction."""
-        mock_model = Mock()
-        mock_model.predict.return_value = np.array([1])
-        mock_registry.get_model.return_value = mock_model
-        mock_registry.get_active_version.return_value = "v1"
-        
-        request = PredictionRequest(features=[1.0, 2.0])
-        await make_prediction(request)
-        
-        # Verify metrics were recorded
-        mock_latency.assert_called_once()
-        mock_request.assert_called_once_with("v1", "success")
-    
-    @patch('app.predict.record_prediction_error')
-    @patch('app.predict.model_registry')
-    async def test_metrics_recorded_on_error(self, mock_registry, mock_error):
+
+    @patch("app.predict.record_prediction_error")
+    async def test_metrics_recorded_on_error(self, mock_error, mock_registry, req_2f):
         """Test that error metrics are recorded on failure."""
-        mock_registry.get_model.side_effect = FileNotFoundError()
+        mock_registry.aget_model.side_effect = FileNotFoundError()
         mock_registry.get_active_version.return_value = "v1"
-        
-        request = PredictionRequest(features=[1.0, 2.0])
-        
+
         with pytest.raises(ValueError):
-            await make_prediction(request)
-        
+            await make_prediction(req_2f)
+
         # Verify error metric was recorded
         mock_error.assert_called_once()